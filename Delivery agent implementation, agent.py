@@ -62,7 +62,7 @@ class DeliveryAgent:
         
         # Move to next position
         self.path.pop(0)  # Remove from path
-        move_cost = self.grid.get_cost(next_pos[0], next_pos[1])
+        move_cost = self.grid.cost[next_pos[1], next_pos[0]]
         
         self.position = next_pos
         self.total_cost += move_cost
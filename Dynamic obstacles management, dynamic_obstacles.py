@@ -3,49 +3,127 @@ Dynamic obstacles management for the grid environment.
 """
 
 import random
+import numpy as np
 from typing import List, Tuple, Dict
 
+DEFAULT_HORIZON = 200  # Time steps of moving obstacle schedules reserved ahead
+
 class DynamicObstacleManager:
-    def __init__(self, grid):
+    def __init__(self, grid, horizon: int = DEFAULT_HORIZON):
         self.grid = grid
-        self.moving_obstacles = []  # List of moving obstacles with schedules
+        self.horizon = horizon
+        self.scheduled_obstacles = []  # List of {time: (x,y)} schedules
+        
+        # Moving obstacles as struct-of-arrays; rows [0, num_moving) are in use and
+        # paths[i, k] is the k-th cell of obstacle i's cyclic path
+        self.num_moving = 0
+        self.speeds = np.empty(0, dtype=np.int32)
+        self.start_times = np.empty(0, dtype=np.int32)
+        self.cycle_lengths = np.empty(0, dtype=np.int32)
+        self.paths = np.empty((0, 0, 2), dtype=np.int16)
+        
+        # Dense moving obstacle schedules: schedule_xy[i, :, t] = (x, y), -1 before start
+        self.schedule_xy = np.empty((0, 2, horizon), dtype=np.int16)
+        
+        # Times at which the obstacle layout changes, so no-op ticks can be skipped
+        self._moves = np.zeros(horizon, dtype=bool)  # Some moving obstacle changes cell at t
+        self._change_times = set()  # A scheduled obstacle appears or disappears at t
+        
+        self.current_positions = set()  # Obstacle cells at the last updated time
+        self._current_time = None
     
     def add_moving_obstacle(self, start_pos: Tuple[int, int], path: List[Tuple[int, int]], 
                            speed: int = 1, start_time: int = 0):
-        """Add a moving obstacle that follows a path."""
-        obstacle = {
-            'position': start_pos,
-            'path': path,
-            'current_index': 0,
-            'speed': speed,
-            'start_time': start_time,
-            'cycle_length': len(path)
-        }
-        self.moving_obstacles.append(obstacle)
-        
-        # Add initial position to grid
-        self.grid.add_dynamic_obstacle(start_pos[0], start_pos[1], [start_time])
+        """Add a moving obstacle that follows a path.
+        
+        The obstacle occupies path[0] at start_time, so start_pos must be that cell.
+        """
+        path = np.asarray(path, dtype=np.int16).reshape(-1, 2)  # (cycle_length, 2) cells
+        if not len(path) or tuple(path[0].tolist()) != tuple(start_pos):
+            raise ValueError(f"start_pos {start_pos} must be the first cell of the path")
+        self._grow(len(path))
+        i = self.num_moving
+        self.speeds[i] = speed
+        self.start_times[i] = start_time
+        self.cycle_lengths[i] = len(path)
+        self.paths[i, :len(path)] = path
+        self.num_moving += 1
+        
+        self._current_time = None
+        
+        # Precompute the obstacle's cyclic schedule up to the horizon and reserve it in the grid
+        schedule = self._schedules(0, self.horizon, first=i)
+        self._mark_moves(schedule, 0)
+        self.schedule_xy = np.concatenate([self.schedule_xy, schedule])
+        self._reserve(schedule[0], 0)
+    
+    def _grow(self, cycle_length: int):
+        """Make room for one more moving obstacle with the given path length."""
+        capacity, max_cycle = self.paths.shape[:2]
+        if self.num_moving < capacity and cycle_length <= max_cycle:
+            return
+        
+        # Double the capacity when full so repeated adds stay amortized O(1)
+        new_capacity = max(1, 2 * capacity) if self.num_moving == capacity else capacity
+        new_cycle = max(max_cycle, cycle_length)
+        
+        paths = np.zeros((new_capacity, new_cycle, 2), dtype=np.int16)
+        paths[:capacity, :max_cycle] = self.paths
+        self.paths = paths
+        for name in ('speeds', 'start_times', 'cycle_lengths'):
+            array = np.ones(new_capacity, dtype=np.int32)
+            array[:capacity] = getattr(self, name)
+            setattr(self, name, array)
+    
+    def _schedules(self, from_time: int, to_time: int, first: int = 0) -> np.ndarray:
+        """Compute (N, 2, T) cell schedules of moving obstacles [first, N) for [from_time, to_time)."""
+        rows = np.arange(first, self.num_moving)
+        elapsed = np.arange(from_time, to_time) - self.start_times[rows, np.newaxis]
+        steps = (elapsed // self.speeds[rows, np.newaxis]) % self.cycle_lengths[rows, np.newaxis]
+        schedules = self.paths[rows[:, np.newaxis], steps]  # (N, T, 2)
+        schedules[elapsed < 0] = -1
+        return schedules.transpose(0, 2, 1)
+    
+    def _mark_moves(self, schedules: np.ndarray, from_time: int):
+        """Mark the times in a (N, 2, T) schedule block at which any obstacle changes cell."""
+        if from_time == 0:
+            previous = np.full(schedules.shape[:2] + (1,), -1, dtype=np.int16)
+        else:
+            previous = self.schedule_xy[:, :, from_time - 1:from_time]
+        cells = np.concatenate([previous, schedules], axis=2)
+        moved = (cells[:, :, 1:] != cells[:, :, :-1]).any(axis=(0, 1))
+        self._moves[from_time:from_time + len(moved)] |= moved
+    
+    def _changes_between(self, from_time: int, to_time: int) -> bool:
+        """Check whether any obstacle changes cell after from_time up to and including to_time."""
+        low, high = sorted((from_time, to_time))
+        if self._moves[low + 1:high + 1].any():
+            return True
+        if high == low + 1:
+            return high in self._change_times
+        return any(low < time <= high for time in self._change_times)
+    
+    def _reserve(self, schedule: np.ndarray, from_time: int):
+        """Reserve the cells of a (2, T) schedule starting at from_time in the grid."""
+        active = np.nonzero(schedule[0] >= 0)[0]
+        times = active + from_time
+        cells = schedule[:, active]
+        for x, y in np.unique(cells, axis=1).T.tolist():
+            self.grid.add_dynamic_obstacle(x, y, times[(cells[0] == x) & (cells[1] == y)])
     
     def add_random_moving_obstacle(self, path_length: int = 5, speed: int = 2, 
                                   start_time: int = 0):
         """Add a randomly moving obstacle."""
         # Find a valid starting position (not on start, goal, or obstacle)
-        valid_positions = []
-        for x in range(self.grid.width):
-            for y in range(self.grid.height):
-                pos = (x, y)
-                if (not self.grid.is_obstacle(x, y) and 
-                    pos != self.grid.start and 
-                    pos != self.grid.goal):
-                    valid_positions.append(pos)
-        
-        if not valid_positions:
+        valid_positions = self.grid.get_valid_positions()
+        if len(valid_positions) == 0:
             return False
         
-        start_pos = random.choice(valid_positions)
+        start_pos = tuple(valid_positions[random.randrange(len(valid_positions))].tolist())
         
         # Generate a random path using random walk
         path = [start_pos]
+        excluded = {start_pos, self.grid.start, self.grid.goal}  # Path cells, start and goal
         current_pos = start_pos
         
         for _ in range(path_length - 1):
@@ -54,56 +132,83 @@ class DynamicObstacleManager:
                 break
             
             # Filter out positions that are start, goal, or already in path
-            valid_neighbors = [n for n in neighbors 
-                             if (n[0], n[1]) != self.grid.start 
-                             and (n[0], n[1]) != self.grid.goal
-                             and (n[0], n[1]) not in path]
+            positions = [(nx, ny) for nx, ny, _ in neighbors]
+            candidates = [pos for pos in positions if pos not in excluded]
             
-            if not valid_neighbors:
+            if not candidates:
                 # If no valid neighbors, choose from all neighbors
-                valid_neighbors = neighbors
+                candidates = positions
             
-            next_pos = random.choice(valid_neighbors)
-            path.append((next_pos[0], next_pos[1]))
-            current_pos = (next_pos[0], next_pos[1])
+            current_pos = random.choice(candidates)
+            path.append(current_pos)
+            excluded.add(current_pos)
         
         self.add_moving_obstacle(start_pos, path, speed, start_time)
         return True
     
     def update_obstacles(self, current_time: int):
-        """Update positions of all moving obstacles for the given time."""
-        # Clear all dynamic obstacles
-        self.grid.dynamic_obstacles.clear()
+        """Advance the current obstacle positions to the given time.
         
-        for obstacle in self.moving_obstacles:
-            if current_time < obstacle['start_time']:
-                continue
-            
-            time_since_start = current_time - obstacle['start_time']
-            step_index = (time_since_start // obstacle['speed']) % obstacle['cycle_length']
-            position = obstacle['path'][step_index]
-            
-            # Add obstacle position for this time step
-            if current_time not in self.grid.dynamic_obstacles:
-                self.grid.dynamic_obstacles[current_time] = set()
-            self.grid.dynamic_obstacles[current_time].add(position)
+        Positions are precomputed in the grid's reservation table when obstacles
+        are added, so the table is only extended once the horizon is reached.
+        current_positions is left as is when no obstacle changed cell since the
+        last update.
+        """
+        if current_time >= self.horizon:
+            new_horizon = max(2 * self.horizon, current_time + 1)
+            extension = self._schedules(self.horizon, new_horizon)
+            for schedule in extension:
+                self._reserve(schedule, self.horizon)
+            self._moves = np.concatenate([self._moves, np.zeros(new_horizon - self.horizon, dtype=bool)])
+            self._mark_moves(extension, self.horizon)
+            self.schedule_xy = np.concatenate([self.schedule_xy, extension], axis=2)
+            self.horizon = new_horizon
+        
+        # Nothing moved since the last update: current_positions is still valid
+        if self._current_time is not None and not self._changes_between(self._current_time, current_time):
+            self._current_time = current_time
+            return
+        
+        self.current_positions = self._positions_at(current_time)
+        self._current_time = current_time
+    
+    def _positions_at(self, time: int) -> set:
+        """Get the cells of all moving and scheduled obstacles at a time step."""
+        # One column fetch gives every moving obstacle's cell at this time
+        if 0 <= time < self.horizon:
+            cells = self.schedule_xy[:, :, time].T
+        else:
+            cells = self._schedules(time, time + 1)[:, :, 0].T
+        positions = set(map(tuple, cells[:, cells[0] >= 0].T.tolist()))
+        positions.update(schedule[time] for schedule in self.scheduled_obstacles if time in schedule)
+        return positions
     
     def add_scheduled_obstacle(self, schedule: Dict[int, Tuple[int, int]]):
         """Add an obstacle with a specific schedule."""
+        schedule = {time: tuple(position) for time, position in schedule.items()}
+        self.scheduled_obstacles.append(schedule)
+        self._change_times.update(t for time in schedule for t in (time, time + 1))
+        self._current_time = None
+        
         for time, position in schedule.items():
             self.grid.add_dynamic_obstacle(position[0], position[1], [time])
     
     def get_obstacle_positions(self, current_time: int) -> List[Tuple[int, int]]:
         """Get all dynamic obstacle positions at the given time."""
-        positions = []
-        if current_time in self.grid.dynamic_obstacles:
-            positions = list(self.grid.dynamic_obstacles[current_time])
-        return positions
+        if current_time == self._current_time:
+            return list(self.current_positions)
+        return list(self._positions_at(current_time))
     
     def clear_all_obstacles(self):
         """Clear all dynamic obstacles."""
-        self.grid.dynamic_obstacles.clear()
-        self.moving_obstacles.clear()
+        self.grid.clear_dynamic_obstacles()
+        self.num_moving = 0
+        self.scheduled_obstacles.clear()
+        self.schedule_xy = self.schedule_xy[:0]
+        self._moves[:] = False
+        self._change_times.clear()
+        self.current_positions.clear()
+        self._current_time = None
 
 
 # Test dynamic obstacles
@@ -4,61 +4,268 @@ Handles static obstacles, terrain costs, and dynamic obstacles.
 """
 
 import numpy as np
+from collections import OrderedDict
 from typing import List, Tuple, Dict, Optional
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; get_neighbors falls back to a Python loop
+    njit = None
+
+
+OBSTACLE = 0  # Terrain cost sentinel marking a static obstacle (real costs are >= 1)
+INF_COST = np.iinfo(np.int32).max  # Effective cost of a cell blocked at a time step
+BLOCKED_CACHE_SIZE = 32  # Per-time blocked masks kept (least recently used evicted)
+RESERVED_CACHE_SIZE = 256  # Per-time reserved cell id arrays kept (least recently used evicted)
+
+
+def _neighbors_kernel(effective_cost, reserved, x, y, out):
+    """Write free 4-neighbors of (x, y) into out as (nx, ny, cost) rows and return the count.
+    
+    effective_cost marks static obstacles with INF_COST; reserved holds the sorted ids
+    (y * width + x) of cells taken by dynamic obstacles at the queried time.
+    """
+    height, width = effective_cost.shape
+    count = 0
+    for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0)):  # Up, Right, Down, Left
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < width and 0 <= ny < height:
+            cost = effective_cost[ny, nx]
+            cell = ny * width + nx
+            i = np.searchsorted(reserved, cell)
+            if i < reserved.shape[0] and reserved[i] == cell:
+                cost = INF_COST
+            if cost != INF_COST:
+                out[count, 0] = nx
+                out[count, 1] = ny
+                out[count, 2] = cost
+                count += 1
+    return count
+
+
+_neighbors_jit = njit(cache=True, boundscheck=False)(_neighbors_kernel) if njit else None
+
+
 class Grid:
+    # Neighbor offsets (4-directional movement): Up, Right, Down, Left
+    _DIRS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+    
     def __init__(self, width: int = 5, height: int = 5):
         self.width = width
         self.height = height
-        self.grid = np.ones((height, width), dtype=int)  # Default cost = 1
-        self.static_obstacles = set()
-        self.dynamic_obstacles = {}  # {time: set((x,y))}
+        self.grid = np.ones((height, width), dtype=int)  # Default cost = 1, OBSTACLE = blocked
+        self._static_mask = None  # Cached self.grid == OBSTACLE
+        self.dynamic_obstacles = {}  # Reservation table {(x,y): sorted int32 array of times}
+        self._reserved_at = {}  # Reverse index of the reservation table {time: set of (x,y)}
+        self._blocked_cache = OrderedDict()  # LRU {time: static | dynamic bool mask}
+        self._effective_cost = None  # int32 terrain costs, INF_COST on static obstacles
+        self._cost_rows = None  # _effective_cost as nested lists for the Python fallback
+        self._reserved_cache = OrderedDict()  # LRU {time: sorted int64 ids of cells reserved at time}
+        self._valid_positions_cache = None  # Cells free at time 0, excluding start and goal
         self.start = (0, 0)
         self.goal = (width-1, height-1)
+        self._neighbor_buf = np.empty((4, 3), dtype=np.int64)  # Output rows for _neighbors_jit
+    
+    @property
+    def start(self) -> Tuple[int, int]:
+        return self._start
+    
+    @start.setter
+    def start(self, position: Tuple[int, int]):
+        self._start = position
+        self._valid_positions_cache = None
+    
+    @property
+    def goal(self) -> Tuple[int, int]:
+        return self._goal
+    
+    @goal.setter
+    def goal(self, position: Tuple[int, int]):
+        self._goal = position
+        self._valid_positions_cache = None
+    
+    @property
+    def cost(self) -> np.ndarray:
+        """Read-only (height, width) costs for direct cost[y, x] indexing in planners.
+        
+        Static obstacles read as INF_COST, never as the cheap OBSTACLE sentinel.
+        """
+        return self._get_effective_cost()
     
     def set_terrain_cost(self, x: int, y: int, cost: int):
-        """Set terrain cost for a cell (must be >= 1)."""
-        if 0 <= x < self.width and 0 <= y < self.height:
+        """Set terrain cost for a cell (must be >= 1). Static obstacles are left in place.
+        
+        Costs must be changed through this method (or add_static_obstacle) so the
+        cached effective costs stay in sync; grid.cost is read-only.
+        """
+        if 0 <= x < self.width and 0 <= y < self.height and self.grid[y, x] != OBSTACLE:
             self.grid[y, x] = max(1, cost)
+            self._effective_cost = None
+            self._cost_rows = None
     
     def add_static_obstacle(self, x: int, y: int):
         """Add a static obstacle at position (x, y)."""
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.static_obstacles.add((x, y))
+            self.grid[y, x] = OBSTACLE
+            self.invalidate_blocked()
+    
+    @property
+    def static_obstacles(self) -> set:
+        """Set of static obstacle positions, derived from the cost grid."""
+        ys, xs = np.nonzero(self.grid == OBSTACLE)
+        return set(zip(xs.tolist(), ys.tolist()))
     
     def add_dynamic_obstacle(self, x: int, y: int, times: List[int]):
         """Add a dynamic obstacle that appears at specific times."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        times = np.unique(np.asarray(times, dtype=np.int32))
+        reserved = self.dynamic_obstacles.get((x, y))
+        if reserved is not None:
+            new_times = np.setdiff1d(times, reserved, assume_unique=True)
+            self.dynamic_obstacles[(x, y)] = np.union1d(reserved, times)
+        else:
+            new_times = times
+            self.dynamic_obstacles[(x, y)] = times
+        
+        new_times = new_times.tolist()
+        for time in new_times:
+            self._reserved_at.setdefault(time, set()).add((x, y))
+        self.invalidate_blocked(new_times)
+    
+    def clear_dynamic_obstacles(self):
+        """Remove all dynamic obstacle reservations."""
+        self.dynamic_obstacles.clear()
+        self._reserved_at.clear()
+        self.invalidate_blocked()
+    
+    def get_dynamic_positions(self, time: int) -> List[Tuple[int, int]]:
+        """Get all cells reserved by dynamic obstacles at the given time."""
+        return list(self._reserved_at.get(time, ()))
+    
+    def invalidate_blocked(self, times: Optional[List[int]] = None):
+        """Drop cached blocked masks for the given times (all times if None)."""
+        if times is None:
+            self._blocked_cache.clear()
+            self._reserved_cache.clear()
+            self._effective_cost = None
+            self._cost_rows = None
+            self._static_mask = None
+            self._valid_positions_cache = None
+            return
         for time in times:
-            if time not in self.dynamic_obstacles:
-                self.dynamic_obstacles[time] = set()
-            self.dynamic_obstacles[time].add((x, y))
+            self._blocked_cache.pop(time, None)
+            self._reserved_cache.pop(time, None)
+        if 0 in times:
+            self._valid_positions_cache = None
+    
+    def get_valid_positions(self) -> np.ndarray:
+        """Get (x, y) rows of cells free at time 0, excluding start and goal."""
+        if self._valid_positions_cache is None:
+            free = ~self.blocked_mask(0)
+            for x, y in (self.start, self.goal):
+                if self.in_bounds(x, y):
+                    free[y, x] = False
+            
+            # Transposed so positions come out column by column (x, then y)
+            xs, ys = np.nonzero(free.T)
+            self._valid_positions_cache = np.stack([xs, ys], axis=1)
+        return self._valid_positions_cache
+    
+    def in_bounds(self, x: int, y: int) -> bool:
+        """Check if (x, y) lies inside the grid (negative indices would wrap around)."""
+        return 0 <= x < self.width and 0 <= y < self.height
+    
+    def _get_static_mask(self) -> np.ndarray:
+        """Get the static obstacle mask, rebuilt from the cost grid when invalidated."""
+        if self._static_mask is None:
+            self._static_mask = self.grid == OBSTACLE
+            self._static_mask.flags.writeable = False
+        return self._static_mask
+    
+    def blocked_mask(self, time: int = 0) -> np.ndarray:
+        """Get the (height, width) mask of cells blocked by static or dynamic obstacles at a time step.
+        
+        Masks are cached and shared between calls, so they are read-only.
+        """
+        blocked = self._blocked_cache.get(time)
+        if blocked is not None:
+            self._blocked_cache.move_to_end(time)
+            return blocked
+        
+        positions = self.get_dynamic_positions(time)
+        if positions:
+            xs, ys = np.array(positions).T
+            blocked = self._get_static_mask().copy()
+            blocked[ys, xs] = True
+            blocked.flags.writeable = False
+        else:
+            blocked = self._get_static_mask()  # Shared, costs no extra memory
+        
+        # Bounded so planners querying many time steps don't keep one mask per step
+        self._blocked_cache[time] = blocked
+        if len(self._blocked_cache) > BLOCKED_CACHE_SIZE:
+            self._blocked_cache.popitem(last=False)
+        return blocked
+    
+    def _get_effective_cost(self) -> np.ndarray:
+        """Get int32 terrain costs with static obstacles set to INF_COST."""
+        if self._effective_cost is None:
+            self._effective_cost = np.where(self._get_static_mask(), INF_COST, self.grid).astype(np.int32)
+            self._effective_cost.flags.writeable = False
+        return self._effective_cost
+    
+    def _get_reserved(self, time: int = 0) -> np.ndarray:
+        """Get the sorted ids (y * width + x) of cells reserved by dynamic obstacles at a time step."""
+        reserved = self._reserved_cache.get(time)
+        if reserved is not None:
+            self._reserved_cache.move_to_end(time)
+            return reserved
+        
+        reserved = np.array(sorted(y * self.width + x for x, y in self._reserved_at.get(time, ())),
+                            dtype=np.int64)
+        self._reserved_cache[time] = reserved
+        if len(self._reserved_cache) > RESERVED_CACHE_SIZE:
+            self._reserved_cache.popitem(last=False)
+        return reserved
     
     def is_obstacle(self, x: int, y: int, time: int = 0) -> bool:
         """Check if cell is blocked by obstacle at given time."""
-        if (x, y) in self.static_obstacles:
-            return True
-        if time in self.dynamic_obstacles and (x, y) in self.dynamic_obstacles[time]:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        if self.grid[y, x] == OBSTACLE:
             return True
-        return False
+        times = self.dynamic_obstacles.get((x, y))
+        if times is None:
+            return False
+        i = np.searchsorted(times, time)
+        return bool(i < len(times) and times[i] == time)
     
     def get_cost(self, x: int, y: int) -> int:
-        """Get terrain cost for a cell."""
-        if 0 <= x < self.width and 0 <= y < self.height:
+        """Get terrain cost for a cell (infinite for static obstacles and outside the grid)."""
+        if 0 <= x < self.width and 0 <= y < self.height and self.grid[y, x] != OBSTACLE:
             return self.grid[y, x]
         return float('inf')
     
     def get_neighbors(self, x: int, y: int, time: int = 0) -> List[Tuple[int, int, int]]:
         """Get valid neighboring cells (4-directional movement)."""
-        neighbors = []
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # Up, Right, Down, Left
+        if _neighbors_jit is not None:
+            count = _neighbors_jit(self._get_effective_cost(), self._get_reserved(time),
+                                   x, y, self._neighbor_buf)
+            return list(map(tuple, self._neighbor_buf[:count].tolist()))
         
-        for dx, dy in directions:
+        # Scalar loop over plain lists: numpy calls on 4 cells cost more than they save
+        if self._cost_rows is None:
+            self._cost_rows = self._get_effective_cost().tolist()
+        cost_rows = self._cost_rows
+        reserved = self._reserved_at.get(time, ())
+        neighbors = []
+        for dx, dy in self._DIRS:
             nx, ny = x + dx, y + dy
-            if (0 <= nx < self.width and 0 <= ny < self.height and 
-                not self.is_obstacle(nx, ny, time)):
-                cost = self.get_cost(nx, ny)
-                neighbors.append((nx, ny, cost))
-        
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                cost = cost_rows[ny][nx]
+                if cost != INF_COST and (nx, ny) not in reserved:
+                    neighbors.append((nx, ny, cost))
         return neighbors
     
     def load_from_file(self, filename: str):
@@ -77,34 +284,35 @@ class Grid:
             # Reinitialize grid with correct size
             self.width = width
             self.height = height
-            self.grid = np.ones((height, width), dtype=int)
-            self.static_obstacles = set()
+            self._static_mask = None
             self.dynamic_obstacles = {}
+            self._reserved_at = {}
+            self._blocked_cache = OrderedDict()
+            self._effective_cost = None
+            self._cost_rows = None
+            self._reserved_cache = OrderedDict()
+            self._valid_positions_cache = None
             self.goal = (width-1, height-1)
             
-            # Parse grid content
-            for y, line in enumerate(lines):
-                cells = line.split(',')
-                for x, char in enumerate(cells):
-                    if x >= width:
-                        continue
-                    char = char.strip()
-                    if char == 'S':
-                        self.start = (x, y)
-                        self.set_terrain_cost(x, y, 1)
-                    elif char == 'G':
-                        self.goal = (x, y)
-                        self.set_terrain_cost(x, y, 1)
-                    elif char == 'X':
-                        self.add_static_obstacle(x, y)
-                    elif char.isdigit():
-                        self.set_terrain_cost(x, y, int(char))
-                    elif char == 'D':
-                        # Mark for dynamic obstacle (to be added separately)
-                        self.set_terrain_cost(x, y, 1)
-                    else:
-                        self.set_terrain_cost(x, y, 1)
-                        
+            # Parse grid content into a (height, width) character array; short rows
+            # are padded with empty cells (cost 1) and extra cells are ignored
+            rows = [[char.strip() for char in line.split(',')[:width]] for line in lines]
+            cells = np.array([row + [''] * (width - len(row)) for row in rows])
+            
+            # Terrain costs in one bulk conversion: digit cells keep their value,
+            # S, G, D, X and anything else cost 1
+            costs = np.where(np.char.isdigit(cells), cells, '1').astype(int)
+            self.grid = np.maximum(costs, 1)
+            self.grid[cells == 'X'] = OBSTACLE
+            
+            # Last occurrence wins, matching a row-by-row scan
+            ys, xs = np.nonzero(cells == 'S')
+            if len(xs):
+                self.start = (int(xs[-1]), int(ys[-1]))
+            ys, xs = np.nonzero(cells == 'G')
+            if len(xs):
+                self.goal = (int(xs[-1]), int(ys[-1]))
+            
             print(f"Successfully loaded map from {filename} ({width}x{height})")
             
         except Exception as e:
@@ -114,37 +322,26 @@ class Grid:
     
     def save_to_file(self, filename: str):
         """Save grid configuration to file."""
+        # Only static obstacles are part of the map file
+        rows = self.char_grid(self._get_static_mask()).tolist()
         with open(filename, 'w') as f:
-            for y in range(self.height):
-                row = []
-                for x in range(self.width):
-                    if (x, y) == self.start:
-                        row.append('S')
-                    elif (x, y) == self.goal:
-                        row.append('G')
-                    elif (x, y) in self.static_obstacles:
-                        row.append('X')
-                    else:
-                        row.append(str(self.grid[y, x]))
-                f.write(','.join(row) + '\n')
+            f.write('\n'.join(','.join(row) for row in rows) + '\n')
+    
+    def char_grid(self, blocked: Optional[np.ndarray] = None) -> np.ndarray:
+        """Get a (height, width) array of cell characters: S, G, X or the terrain cost."""
+        if blocked is None:
+            blocked = self.blocked_mask(0)
+        # Format each distinct cost once, then gather (np.char formats element by element)
+        chars = np.char.mod('%d', np.arange(self.grid.max() + 1))[self.grid]
+        chars[blocked] = 'X'
+        for (x, y), char in ((self.goal, 'G'), (self.start, 'S')):
+            if self.in_bounds(x, y):
+                chars[y, x] = char
+        return chars
     
     def __str__(self):
         """String representation of the grid."""
-        result = []
-        for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                if (x, y) == self.start:
-                    row.append('S')
-                elif (x, y) == self.goal:
-                    row.append('G')
-                elif self.is_obstacle(x, y):
-                    row.append('X')
-                else:
-                    row.append(str(self.grid[y, x]))
-            result.append(' '.join(row))
-        return '\n'.join(result)
-
+        return '\n'.join(' '.join(row) for row in self.char_grid().tolist())
 
 # Test the Grid class
 if __name__ == "__main__":
@@ -3,8 +3,9 @@ Visualization utilities for the grid and agent path.
 """
 
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+import matplotlib.colors as mcolors
 import numpy as np
+from typing import List, Tuple
 
 class GridVisualizer:
     def __init__(self, grid):
@@ -18,77 +19,122 @@ class GridVisualizer:
             'agent': 'orange',
             'text': 'white'
         }
+        
+        # Artists reused across frames
+        self._image = None
+        self._labels = []
+        self._label_values = None
+        self._label_colors = None
+        self._overlays = []
+    
+    def _render_cells(self, current_time: int, current_agent_pos: Tuple[int, int] = None):
+        """Build the RGBA cell image, cell labels and label colors for a time step."""
+        cost = self.grid.grid
+        height, width = cost.shape
+        
+        # Color based on terrain cost (lighter for lower cost), blue tint for higher costs
+        intensity = np.maximum(0.3, 1.0 - np.minimum(cost, 10) / 20.0)
+        rgba = np.empty((height, width, 4), dtype=np.float32)
+        rgba[..., 0] = intensity
+        rgba[..., 1] = intensity
+        rgba[..., 2] = 1.0
+        rgba[..., 3] = 0.8
+        
+        obstacles = self.grid.blocked_mask(current_time)
+        labels = self.grid.char_grid(obstacles)  # S, G, X or terrain cost
+        special = obstacles.copy()
+        
+        # Apply overlays from lowest to highest priority: agent, obstacle, goal, start
+        if current_agent_pos and self.grid.in_bounds(*current_agent_pos):
+            agent_x, agent_y = current_agent_pos
+            rgba[agent_y, agent_x] = mcolors.to_rgba(self.colors['agent'], 0.8)
+            if labels[agent_y, agent_x].isdigit():
+                labels[agent_y, agent_x] = 'A'
+        
+        rgba[obstacles] = mcolors.to_rgba(self.colors['obstacle'], 0.8)
+        for key, (x, y) in (('goal', self.grid.goal), ('start', self.grid.start)):
+            if not self.grid.in_bounds(x, y):
+                continue
+            rgba[y, x] = mcolors.to_rgba(self.colors[key], 0.8)
+            special[y, x] = True
+        
+        text_colors = np.where(special, 'white', 'black')
+        return rgba, labels, text_colors
+    
+    def _build_axes(self, rgba: np.ndarray, labels: np.ndarray, text_colors: np.ndarray):
+        """Create the cell image and label artists for the current grid size."""
+        height, width = labels.shape
+        self.ax.clear()
+        self._overlays = []
+        
+        self._image = self.ax.imshow(rgba, origin='upper', extent=(0, width, height, 0),
+                                     interpolation='nearest')
+        self._labels = [self.ax.text(x + 0.5, y + 0.5, labels[y, x], ha='center', va='center',
+                                     fontweight='bold', color=text_colors[y, x], fontsize=12)
+                        for y in range(height) for x in range(width)]
+        self._label_values = labels
+        self._label_colors = text_colors
+        
+        # Cell borders
+        self.ax.vlines(np.arange(width + 1), 0, height, colors='black', linewidth=2)
+        self.ax.hlines(np.arange(height + 1), 0, width, colors='black', linewidth=2)
+        
+        # y-axis inverted to match matrix coordinates
+        self.ax.set_xlim(-0.5, width + 0.5)
+        self.ax.set_ylim(height + 0.5, -0.5)
+        self.ax.set_aspect('equal')
+        self.ax.set_xlabel('X Coordinate', fontsize=12)
+        self.ax.set_ylabel('Y Coordinate', fontsize=12)
+        self.ax.grid(True, alpha=0.3)
+        
+        plt.tight_layout()
+    
+    def _update_cells(self, rgba: np.ndarray, labels: np.ndarray, text_colors: np.ndarray):
+        """Update the existing cell image and only the labels that changed."""
+        self._image.set_data(rgba)
+        
+        changed = (labels != self._label_values) | (text_colors != self._label_colors)
+        width = labels.shape[1]
+        for y, x in zip(*np.nonzero(changed)):
+            text = self._labels[y * width + x]
+            text.set_text(labels[y, x])
+            text.set_color(text_colors[y, x])
+        self._label_values = labels
+        self._label_colors = text_colors
     
     def plot_grid(self, agent_path: List[Tuple[int, int]] = None, 
                  current_time: int = 0, title: str = "Autonomous Delivery Agent",
                  current_agent_pos: Tuple[int, int] = None):
         """Plot the grid with obstacles, terrain costs, and agent path."""
-        self.ax.clear()
+        rgba, labels, text_colors = self._render_cells(current_time, current_agent_pos)
+        if self._image is None or self._label_values.shape != labels.shape:
+            self._build_axes(rgba, labels, text_colors)
+        else:
+            self._update_cells(rgba, labels, text_colors)
         
-        # Create grid visualization
-        for y in range(self.grid.height):
-            for x in range(self.grid.width):
-                cost = self.grid.get_cost(x, y)
-                is_obstacle = self.grid.is_obstacle(x, y, current_time)
-                is_start = (x, y) == self.grid.start
-                is_goal = (x, y) == self.grid.goal
-                is_agent = current_agent_pos and (x, y) == current_agent_pos
-                
-                # Set cell color based on content
-                if is_start:
-                    color = self.colors['start']
-                    text = 'S'
-                elif is_goal:
-                    color = self.colors['goal']
-                    text = 'G'
-                elif is_obstacle:
-                    color = self.colors['obstacle']
-                    text = 'X'
-                elif is_agent:
-                    color = self.colors['agent']
-                    text = 'A'
-                else:
-                    # Color based on terrain cost (lighter for lower cost)
-                    intensity = max(0.3, 1.0 - (min(cost, 10) / 20.0))
-                    color = (intensity, intensity, 1.0)  # Blue tint for higher costs
-                    text = str(cost)
-                
-                # Create rectangle for cell
-                rect = patches.Rectangle((x, y), 1, 1, linewidth=2, 
-                                       edgecolor='black', facecolor=color, alpha=0.8)
-                self.ax.add_patch(rect)
-                
-                # Add text
-                text_color = 'white' if is_obstacle or is_start or is_goal else 'black'
-                self.ax.text(x + 0.5, y + 0.5, text, ha='center', va='center', 
-                           fontweight='bold', color=text_color, fontsize=12)
+        # Remove the previous frame's path and agent markers
+        for artist in self._overlays:
+            artist.remove()
+        self._overlays = []
         
         # Plot agent path if provided
         if agent_path and len(agent_path) > 1:
             path_x = [pos[0] + 0.5 for pos in agent_path]
             path_y = [pos[1] + 0.5 for pos in agent_path]
-            self.ax.plot(path_x, path_y, 'r-', linewidth=3, alpha=0.7, label='Planned Path')
-            self.ax.plot(path_x, path_y, 'ro', markersize=8, alpha=0.5)
+            self._overlays += self.ax.plot(path_x, path_y, 'r-', linewidth=3, alpha=0.7, label='Planned Path')
+            self._overlays += self.ax.plot(path_x, path_y, 'ro', markersize=8, alpha=0.5)
         
         # Plot current agent position
         if current_agent_pos:
             agent_x, agent_y = current_agent_pos
-            self.ax.plot(agent_x + 0.5, agent_y + 0.5, 'o', markersize=15, 
-                       color=self.colors['agent'], label='Current Position')
+            self._overlays += self.ax.plot(agent_x + 0.5, agent_y + 0.5, 'o', markersize=15, 
+                                           color=self.colors['agent'], label='Current Position')
         
-        self.ax.set_xlim(-0.5, self.grid.width + 0.5)
-        self.ax.set_ylim(-0.5, self.grid.height + 0.5)
-        self.ax.set_aspect('equal')
         self.ax.set_title(title, fontsize=16, fontweight='bold')
-        self.ax.set_xlabel('X Coordinate', fontsize=12)
-        self.ax.set_ylabel('Y Coordinate', fontsize=12)
-        self.ax.grid(True, alpha=0.3)
-        self.ax.legend()
-        
-        # Invert y-axis to match matrix coordinates
-        self.ax.invert_yaxis()
-        
-        plt.tight_layout()
+        if self._overlays:
+            self.ax.legend()
+        elif self.ax.get_legend():
+            self.ax.get_legend().remove()
     
     def animate_path(self, path: List[Tuple[int, int]], 
                     obstacle_manager=None, interval: float = 1.0):
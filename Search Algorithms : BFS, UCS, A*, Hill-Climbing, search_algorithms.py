@@ -26,6 +26,13 @@ class SearchAlgorithms:
         """Admissible heuristic for A* search."""
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
     
+    def path_cost(self, path: List[Tuple[int, int]]) -> int:
+        """Total terrain cost of the cells entered along a path."""
+        if len(path) < 2:
+            return 0
+        xs, ys = zip(*path[1:])
+        return int(self.grid.cost[ys, xs].sum())
+    
     def bfs(self, start: Tuple[int, int], goal: Tuple[int, int], 
             time_step: int = 0) -> SearchResult:
         """Breadth-First Search implementation."""
@@ -44,7 +51,7 @@ class SearchAlgorithms:
             
             if current == goal:
                 # Calculate actual path cost (not just steps)
-                cost = sum(self.grid.get_cost(x, y) for x, y in path[1:])
+                cost = self.path_cost(path)
                 return SearchResult(path, cost, nodes_expanded, time.time() - start_time)
             
             current_time = time_step + len(path)
@@ -192,7 +199,7 @@ class SearchAlgorithms:
                 if len(path) > 3:
                     current = path[random.randint(1, min(3, len(path)-1))]
                     path = path[:path.index(current)+1]
-                    current_cost = sum(self.grid.get_cost(x, y) for x, y in path[1:])
+                    current_cost = self.path_cost(path)
         
         success = best_path and best_path[-1] == goal
         return SearchResult(best_path, best_cost, total_nodes_expanded, 